@@ -11,44 +11,154 @@ so they can be uploaded without leaking any embedded information.
 from __future__ import annotations
 
 import argparse
+import functools
+import io
+import os
 import pathlib
 import sys
-from typing import Iterable, Set
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, Optional, Tuple
 
-from PIL import Image, ImageOps  # type: ignore
+from PIL import Image, ImageOps, UnidentifiedImageError  # type: ignore
+
+# Progress lines are block-buffered and flushed once per this many files.
+FLUSH_EVERY = 100
+
+# Embedded thumbnails, depth maps and auxiliary images are never written to
+# the JPEG, so don't have libheif decode them at all.
+HEIF_OPTIONS = {"thumbnails": False, "depth_images": False, "aux_images": False}
 
 try:
     from pillow_heif import register_heif_opener  # type: ignore
 
-    register_heif_opener()
+    register_heif_opener(**HEIF_OPTIONS)
 except ImportError:
     sys.exit(
         "Error: pillow-heif not installed. Run 'pip install pillow-heif' "
         "(and 'brew install libheif' on macOS) then retry."
     )
 
-
-def discover(root: pathlib.Path, exts: Set[str], recursive: bool) -> Iterable[pathlib.Path]:
-    iterator = root.rglob("*") if recursive else root.iterdir()
-    for p in iterator:
-        if p.is_file() and p.suffix.lower().lstrip(".") in exts:
-            yield p
-
-
-def convert(src: pathlib.Path, quality: int, delete: bool) -> None:
+try:
+    import pyvips  # type: ignore
+except ImportError:
+    pyvips = None
+
+
+def discover(root: pathlib.Path, suffixes: Tuple[str, ...], recursive: bool) -> Iterable[pathlib.Path]:
+    # os.scandir's DirEntry answers is_file()/is_dir() from the directory
+    # listing itself, so unlike Path.rglob no stat() is issued per regular
+    # file. Symlinked files are followed; symlinked folders are not, as with
+    # Path.rglob.
+    top_level = os.fspath(root)
+    stack = [top_level]
+    while stack:
+        top = stack.pop()
+        try:
+            entries = os.scandir(top)
+        except OSError:
+            # Like Path.rglob, skip unreadable sub-folders but not the root.
+            if top == top_level:
+                raise
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                elif (
+                    entry.name.lower().endswith(suffixes)
+                    # Like Path.suffix, a bare ".heic" has no extension.
+                    and entry.name.rfind(".") > 0
+                    and entry.is_file()
+                ):
+                    yield pathlib.Path(entry.path)
+
+
+# Runs in a worker process: log lines are returned for the parent to print so
+# output from concurrent conversions does not interleave.
+def convert(
+    src: pathlib.Path,
+    quality: int,
+    delete: bool,
+    backend: str = "pillow",
+    max_dim: Optional[int] = None,
+    force: bool = False,
+) -> str:
     dst = src.with_suffix(".jpg")
-    if dst.exists():
-        print(f"[SKIP] {dst.name} already exists")
-        return
-
-    with Image.open(src) as im:
-        im = ImageOps.exif_transpose(im)
-        im.convert("RGB").save(dst, "JPEG", quality=quality)
-        print(f"[OK] {src.name} → {dst.name}")
+    try:
+        dst_stat: Optional[os.stat_result] = os.stat(dst)
+    except FileNotFoundError:
+        dst_stat = None
+    if dst_stat is not None:
+        # A source that is its own output (e.g. --ext jpg, or b.JPG on a
+        # case-insensitive file system) must never be rewritten in place, and
+        # --delete would then remove the only copy.
+        if os.path.samestat(dst_stat, os.stat(src)):
+            return f"[SKIP] {src.name} is already the output file"
+        # Empty leftovers from an interrupted run are overwritten, not skipped.
+        if not force and dst_stat.st_size > 0:
+            return f"[SKIP] {dst.name} already exists"
+
+    # Read the source in one request and write the JPEG in one request rather
+    # than letting the decoder/encoder issue many small seeks and writes; this
+    # matters on network shares and spinning disks. Encoding into memory also
+    # means a failed conversion never leaves a truncated JPEG behind.
+    data = src.read_bytes()
+    if backend == "vips":
+        # libvips decodes from the in-memory source and encodes to an
+        # in-memory JPEG in one pipeline, with no intermediate Pillow image;
+        # `strip` drops all metadata and autorot() applies the orientation.
+        if max_dim:
+            # thumbnail_buffer shrinks during load and autorotates itself.
+            im = pyvips.Image.thumbnail_buffer(data, max_dim, height=max_dim, size="down")
+        else:
+            im = pyvips.Image.new_from_buffer(data, "", access="sequential")
+            if im.get_typeof("orientation") and im.get("orientation") != 1:
+                # Rotating needs random access to the pixels, which a
+                # sequential load cannot provide; reload without the hint.
+                im = pyvips.Image.new_from_buffer(data, "").autorot()
+        if im.hasalpha():
+            # Drop alpha as Pillow's convert("RGB") does; the JPEG saver would
+            # otherwise flatten transparent pixels onto black.
+            im = im[: im.bands - 1]
+        out = im.write_to_buffer(f".jpg[Q={quality},strip]")
+    else:
+        buf = io.BytesIO()
+        try:
+            src_im = Image.open(io.BytesIO(data))
+        except UnidentifiedImageError:
+            # Opening from memory hides the path Pillow would otherwise report.
+            raise UnidentifiedImageError(f"cannot identify image file {str(src)!r}") from None
+        with src_im as im:
+            if max_dim:
+                # Let decoders that support it (e.g. libjpeg's scaled IDCT)
+                # downsample while decoding instead of after.
+                im.draft("RGB", (max_dim, max_dim))
+            # exif_transpose() returns a full copy even for the identity
+            # orientation (1), which is most photos; only call it when needed.
+            if im.getexif().get(0x0112, 1) != 1:  # 0x0112 = Orientation
+                im = ImageOps.exif_transpose(im)
+            if max_dim:
+                im.thumbnail((max_dim, max_dim))
+            # convert() copies the whole buffer even when the mode already matches.
+            if im.mode != "RGB":
+                im = im.convert("RGB")
+            # Pillow's JPEG encoder only writes metadata passed explicitly via
+            # exif=/icc_profile=, so omitting them yields a metadata-free file in
+            # the same pass; no separate exiftool strip step is needed.
+            # Pin the cheap encoder path explicitly: 4:2:0 chroma subsampling,
+            # no second Huffman-optimisation pass, baseline (not progressive).
+            im.save(
+                buf, "JPEG", quality=quality, subsampling=2, optimize=False, progressive=False
+            )
+        out = buf.getbuffer()
+    dst.write_bytes(out)
+    log = f"[OK] {src.name} → {dst.name}"
 
     if delete:
         src.unlink()
-        print(f"      Deleted original {src.name}")
+        log += f"\n      Deleted original {src.name}"
+    return log
 
 
 def main() -> None:
@@ -60,7 +170,23 @@ def main() -> None:
     p.add_argument("-r", "--recursive", action="store_true", help="Recurse into sub-folders.")
     p.add_argument("-q", "--quality", type=int, default=90, help="JPEG quality 1-100.")
     p.add_argument("--delete", action="store_true", help="Delete original files after conversion.")
+    p.add_argument("--force", action="store_true", help="Overwrite existing JPEG files.")
     p.add_argument("--ext", default="heic,heif", help="Comma-separated list of extensions to process.")
+    p.add_argument(
+        "--backend",
+        choices=("pillow", "vips"),
+        default="pillow",
+        help="Image library used for decoding and encoding (vips requires pyvips).",
+    )
+    p.add_argument(
+        "--max-dim",
+        type=int,
+        default=None,
+        help="Downscale so neither side exceeds this many pixels (default: keep full size).",
+    )
+    p.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count(), help="Number of files to convert in parallel."
+    )
 
     args = p.parse_args()
 
@@ -68,18 +194,51 @@ def main() -> None:
         p.error(f"{args.directory} does not exist.")
     if not (1 <= args.quality <= 100):
         p.error("--quality must be between 1 and 100.")
+    if args.max_dim is not None and args.max_dim < 1:
+        p.error("--max-dim must be at least 1.")
+    if args.jobs is not None and args.jobs < 1:
+        p.error("--jobs must be at least 1.")
+    if args.backend == "vips" and pyvips is None:
+        p.error(
+            "--backend vips requires pyvips and a system libvips built with libheif and "
+            "libde265 (e.g. 'brew install vips', then 'pip install pyvips'); the libvips "
+            "bundled by 'pip install pyvips-binary' cannot decode HEIC."
+        )
 
     exts = {e.strip().lower().lstrip(".") for e in args.ext.split(",") if e.strip()}
     if not exts:
         p.error("--ext yielded no valid extensions.")
+    # str.endswith accepts a tuple, checking every suffix in one C-level call.
+    suffixes = tuple(f".{e}" for e in exts)
+
+    # A terminal line-buffers stdout, costing a write() per progress line;
+    # buffer instead and flush in batches (and before any error is reported).
+    # A replaced stdout (e.g. io.StringIO) has no reconfigure() and is left as is.
+    reconfigure = getattr(sys.stdout, "reconfigure", None)
+    if reconfigure is not None:
+        reconfigure(line_buffering=False)
 
     total = 0
-    for src in discover(args.directory, exts, args.recursive):
-        try:
-            convert(src, args.quality, args.delete)
-            total += 1
-        except Exception as exc:
-            print(f"[ERROR] {src.name}: {exc}", file=sys.stderr)
+    done = 0
+    with ProcessPoolExecutor(
+        max_workers=args.jobs, initializer=functools.partial(register_heif_opener, **HEIF_OPTIONS)
+    ) as ex:
+        futures = {
+            ex.submit(
+                convert, src, args.quality, args.delete, args.backend, args.max_dim, args.force
+            ): src
+            for src in discover(args.directory, suffixes, args.recursive)
+        }
+        for fut in as_completed(futures):
+            try:
+                sys.stdout.write(fut.result() + "\n")
+                total += 1
+            except Exception as exc:
+                sys.stdout.flush()
+                print(f"[ERROR] {futures[fut].name}: {exc}", file=sys.stderr)
+            done += 1
+            if done % FLUSH_EVERY == 0:
+                sys.stdout.flush()
 
     if total == 0:
         print("No matching files converted (review [ERROR] lines).")
@@ -0,0 +1,161 @@
+import io
+import pathlib
+import sys
+
+import pytest
+from PIL import Image
+
+import sanitize_heic_to_jpg
+
+
+# Tall enough that a sequential libvips load cannot satisfy a rotation from
+# its line cache.
+def make_rotated(path: pathlib.Path, orientation: int, size=(400, 3000)) -> None:
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    exif[0x010F] = "Apple"
+    Image.new("RGB", size, "red").save(path, exif=exif.tobytes())
+
+
+@pytest.mark.parametrize("backend", ["pillow", "vips"])
+@pytest.mark.parametrize(
+    "orientation,size", [(1, (400, 3000)), (3, (400, 3000)), (6, (3000, 400)), (8, (3000, 400))]
+)
+def test_convert_applies_orientation_and_strips_metadata(tmp_path, backend, orientation, size):
+    if backend == "vips" and sanitize_heic_to_jpg.pyvips is None:
+        pytest.skip("pyvips not installed")
+    src = tmp_path / "photo.jpeg"
+    make_rotated(src, orientation)
+
+    sanitize_heic_to_jpg.convert(src, 90, False, backend)
+
+    with Image.open(tmp_path / "photo.jpg") as out:
+        assert out.size == size
+        assert not out.getexif()
+
+
+@pytest.mark.parametrize("backend", ["pillow", "vips"])
+@pytest.mark.parametrize("orientation,size", [(1, (500, 375)), (6, (375, 500))])
+def test_convert_max_dim_downscales_after_orientation(tmp_path, backend, orientation, size):
+    if backend == "vips" and sanitize_heic_to_jpg.pyvips is None:
+        pytest.skip("pyvips not installed")
+    src = tmp_path / "photo.jpeg"
+    make_rotated(src, orientation, (4000, 3000))
+
+    sanitize_heic_to_jpg.convert(src, 90, False, backend, max_dim=500)
+
+    with Image.open(tmp_path / "photo.jpg") as out:
+        assert out.size == size
+        assert not out.getexif()
+
+
+@pytest.mark.parametrize(
+    "existing,force,replaced", [(b"old", False, False), (b"", False, True), (b"old", True, True)]
+)
+def test_convert_existing_output(tmp_path, existing, force, replaced):
+    src = tmp_path / "photo.heic"
+    Image.new("RGB", (40, 30), "red").save(src)
+    (tmp_path / "photo.jpg").write_bytes(existing)
+
+    log = sanitize_heic_to_jpg.convert(src, 90, False, force=force)
+
+    assert log.startswith("[OK]" if replaced else "[SKIP]")
+    assert ((tmp_path / "photo.jpg").read_bytes() != existing) is replaced
+
+
+def test_convert_never_overwrites_or_deletes_its_own_source(tmp_path):
+    src = tmp_path / "photo.jpg"
+    Image.new("RGB", (40, 30), "red").save(src)
+    original = src.read_bytes()
+
+    log = sanitize_heic_to_jpg.convert(src, 50, True, force=True)
+
+    assert log.startswith("[SKIP]")
+    assert src.read_bytes() == original
+
+
+def test_vips_converts_heic(tmp_path):
+    pyvips = sanitize_heic_to_jpg.pyvips
+    if pyvips is None:
+        pytest.skip("pyvips not installed")
+    src = tmp_path / "photo.heic"
+    exif = Image.Exif()
+    exif[0x010F] = "Apple"
+    Image.new("RGB", (400, 300), "red").save(src, exif=exif.tobytes())
+    try:
+        # Loading is lazy; avg() forces libheif to actually decode the image.
+        pyvips.Image.new_from_file(str(src)).avg()
+    except pyvips.Error:
+        pytest.skip("libvips cannot decode HEIC (needs libheif with libde265)")
+
+    sanitize_heic_to_jpg.convert(src, 90, False, "vips")
+
+    with Image.open(tmp_path / "photo.jpg") as out:
+        assert out.size == (400, 300)
+        assert not out.getexif()
+
+
+@pytest.mark.parametrize("backend", ["pillow", "vips"])
+def test_convert_drops_alpha_without_flattening(tmp_path, backend):
+    if backend == "vips" and sanitize_heic_to_jpg.pyvips is None:
+        pytest.skip("pyvips not installed")
+    src = tmp_path / "photo.png"
+    Image.new("RGBA", (64, 64), (0, 0, 254, 0)).save(src)
+
+    sanitize_heic_to_jpg.convert(src, 90, False, backend)
+
+    with Image.open(tmp_path / "photo.jpg") as out:
+        r, g, b = out.convert("RGB").getpixel((32, 32))
+        assert r < 8 and g < 8 and b > 240
+
+
+def test_discover_follows_symlinked_files(tmp_path):
+    (tmp_path / "b.HEIC").touch()
+    (tmp_path / "link.heic").symlink_to("b.HEIC")
+
+    found = sanitize_heic_to_jpg.discover(tmp_path, (".heic",), False)
+
+    assert sorted(p.name for p in found) == ["b.HEIC", "link.heic"]
+
+
+def test_discover_skips_name_that_is_only_an_extension(tmp_path):
+    for name in (".heic", ".hidden.heic", "a.heic"):
+        (tmp_path / name).touch()
+
+    found = sanitize_heic_to_jpg.discover(tmp_path, (".heic",), False)
+
+    assert sorted(p.name for p in found) == [".hidden.heic", "a.heic"]
+
+
+def test_main_reports_errors_and_counts_conversions(tmp_path, monkeypatch, capsys):
+    Image.new("RGB", (40, 30), "red").save(tmp_path / "good.heic")
+    (tmp_path / "bad.heic").write_bytes(b"not an image")
+    monkeypatch.setattr(sys, "argv", ["sanitize_heic_to_jpg.py", str(tmp_path), "-j", "2"])
+
+    sanitize_heic_to_jpg.main()
+
+    out, err = capsys.readouterr()
+    assert "[OK] good.heic → good.jpg" in out
+    assert out.endswith("Done. Converted 1 file.\n")
+    assert "[ERROR] bad.heic: cannot identify image file" in err
+    assert not (tmp_path / "bad.jpg").exists()
+
+
+def test_main_accepts_stdout_without_reconfigure(tmp_path, monkeypatch):
+    Image.new("RGB", (40, 30), "red").save(tmp_path / "good.heic")
+    monkeypatch.setattr(sys, "argv", ["sanitize_heic_to_jpg.py", str(tmp_path)])
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+
+    sanitize_heic_to_jpg.main()
+
+    assert sys.stdout.getvalue().endswith("Done. Converted 1 file.\n")
+
+
+@pytest.mark.parametrize("option", [["-j", "0"], ["--max-dim", "0"], ["-q", "101"]])
+def test_main_rejects_invalid_options(tmp_path, monkeypatch, option):
+    monkeypatch.setattr(sys, "argv", ["sanitize_heic_to_jpg.py", str(tmp_path), *option])
+
+    with pytest.raises(SystemExit) as exc:
+        sanitize_heic_to_jpg.main()
+
+    assert exc.value.code == 2